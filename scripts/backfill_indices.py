@@ -8,9 +8,9 @@ gradually age out of the dashboard's trailing windows.
 Run:
     FRED_API_KEY=<your key> python scripts/backfill_indices.py
 
-This OVERWRITES data/market_indices.json with a freshly recomputed history
-(every valid trading day in the ~3-year fetch window). Review the diff before
-committing.
+This OVERWRITES data/market_indices.json (and every other universe's
+output file, see UNIVERSES) with a freshly recomputed history (every valid
+trading day in the ~3-year fetch window). Review the diff before committing.
 """
 import json
 import os
@@ -18,10 +18,11 @@ import os
 from fredapi import Fred
 
 from update_indices import (
-    DATA_PATH,
-    compute_index_dataframe,
+    UNIVERSES,
+    compute_universe_dataframes,
     market_data_to_record,
     row_to_market_data,
+    write_snapshot,
 )
 
 FRED_API_KEY = os.environ.get('FRED_API_KEY')
@@ -33,23 +34,30 @@ def backfill():
         return False
 
     fred = Fred(api_key=FRED_API_KEY)
-    valid_df = compute_index_dataframe(fred)
+    results = compute_universe_dataframes(fred)
 
-    if valid_df is None:
-        print("Error: compute_index_dataframe returned no data.")
-        return False
+    ok = True
+    for name, valid_df in results.items():
+        if valid_df is None:
+            print(f"Error: compute_universe_dataframes returned no data for universe {name}.")
+            ok = False
+            continue
+
+        records = []
+        for idx, row in valid_df.iterrows():
+            date_str = idx.strftime("%Y-%m-%d")
+            market_data = row_to_market_data(row)
+            records.append(market_data_to_record(date_str, market_data))
 
-    records = []
-    for idx, row in valid_df.iterrows():
-        date_str = idx.strftime("%Y-%m-%d")
-        market_data = row_to_market_data(row)
-        records.append(market_data_to_record(date_str, market_data))
+        data_path = UNIVERSES[name]['output_path']
+        with open(data_path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, separators=(',', ':'))
 
-    with open(DATA_PATH, 'w', encoding='utf-8') as f:
-        json.dump(records, f, separators=(',', ':'))
+        print(f"Backfilled {len(records)} records ({records[0][0]} to {records[-1][0]}) to {data_path}")
 
-    print(f"Backfilled {len(records)} records ({records[0][0]} to {records[-1][0]}) to {DATA_PATH}")
-    return True
+    if results.get('us') is not None:
+        write_snapshot()
+    return ok
 
 
 if __name__ == "__main__":
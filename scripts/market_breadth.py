@@ -0,0 +1,304 @@
+"""Market breadth: percent of S&P 500 members trading above their 200-day
+moving average, used as a fifth Sentiment component in update_indices.py.
+
+Fetching ~500 tickers in one `yf.download` call is slow and all-or-nothing,
+so prices are downloaded in chunks on a small thread pool, kept as a compact
+float32 (dates x tickers) matrix cached on disk, and only the last few days
+are re-downloaded on subsequent runs. Every stage degrades gracefully:
+missing tickers, failed chunks or an unavailable constituent list shrink the
+universe (or return all-NaN breadth) instead of aborting the pipeline.
+
+The universe is *today's* S&P 500 membership applied to all history, not
+point-in-time constituents: names that were dropped (often after falling)
+are missing and recent additions (often after rising) are included early,
+so historical breadth is survivorship-biased upward. Treat backfilled
+breadth as indicative; only the latest readings use the true membership.
+"""
+import io
+import json
+import os
+import time
+import urllib.request
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+BREADTH_MA_WINDOW = 200  # moving-average window members are compared against
+BREADTH_LOOKBACK_DAYS = BREADTH_MA_WINDOW + 10  # business days fetched before start_date (+10 covers exchange holidays)
+BREADTH_MIN_COVERAGE = 0.5  # fraction of the universe that must have a valid MA on a day
+BREADTH_CHUNK_SIZE = 100  # tickers per yf.download call
+BREADTH_MAX_WORKERS = 4  # concurrent chunk downloads
+BREADTH_REQUEST_TIMEOUT_SECONDS = 30  # per-request timeout passed to yf.download
+BREADTH_DEADLINE_SECONDS = 180  # total wait for all chunks; later chunks are dropped
+BREADTH_REFRESH_OVERLAP_DAYS = 7  # re-download this many recent days on a cache hit
+BREADTH_REVISION_TOLERANCE = 0.02  # overlap price drift (splits, special dividends) that forces a full re-download
+BREADTH_CACHE_DIR = os.environ.get('BREADTH_CACHE_DIR', '.cache/breadth')
+UNIVERSE_MAX_AGE_DAYS = 7  # refresh the cached constituent list weekly
+UNIVERSE_URL = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
+
+
+def get_universe(cache_dir=None):
+    """S&P 500 constituent tickers in Yahoo format (BRK.B -> BRK-B).
+
+    Served from a cached list younger than UNIVERSE_MAX_AGE_DAYS; otherwise
+    re-scraped, falling back to a stale cache, then to an empty list.
+    """
+    cache_dir = BREADTH_CACHE_DIR if cache_dir is None else cache_dir
+    path = os.path.join(cache_dir, 'universe.json')
+
+    cached = None
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if time.time() - os.path.getmtime(path) < UNIVERSE_MAX_AGE_DAYS * 86400:
+                return cached
+        except (OSError, json.JSONDecodeError):
+            cached = None
+
+    try:
+        request = urllib.request.Request(UNIVERSE_URL, headers={'User-Agent': 'Mozilla/5.0'})
+        with urllib.request.urlopen(request, timeout=30) as response:
+            html = response.read().decode('utf-8')
+        table = pd.read_html(io.StringIO(html))[0]
+        tickers = sorted({str(t).strip().replace('.', '-') for t in table['Symbol']})
+    except Exception as e:
+        print(f"Warning: Could not fetch S&P 500 constituents: {e}")
+        return cached or []
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(tickers, f)
+    except OSError as e:
+        print(f"Warning: Could not cache S&P 500 constituents: {e}")
+    return tickers
+
+
+def _download_chunk(tickers, start_date, timeout=BREADTH_REQUEST_TIMEOUT_SECONDS):
+    """Close prices for one chunk as a float32 frame; missing tickers are
+    simply absent from the columns.
+    """
+    data = yf.download(tickers, start=start_date, progress=False, threads=False, timeout=timeout)
+    if data is None or data.empty:
+        return pd.DataFrame()
+
+    if isinstance(data.columns, pd.MultiIndex):
+        level = 'Adj Close' if 'Adj Close' in data.columns.get_level_values(0) else 'Close'
+        prices = data[level]
+    else:
+        prices = data[['Adj Close' if 'Adj Close' in data.columns else 'Close']]
+        prices.columns = tickers[:1]
+
+    prices = prices.dropna(axis=1, how='all').astype(np.float32)
+    prices.index = pd.DatetimeIndex(prices.index).normalize()
+    return prices
+
+
+def download_price_matrix(tickers, start_date, chunk_size=BREADTH_CHUNK_SIZE,
+                          max_workers=BREADTH_MAX_WORKERS, timeout=BREADTH_REQUEST_TIMEOUT_SECONDS,
+                          deadline=BREADTH_DEADLINE_SECONDS):
+    """Download `tickers` in chunks on a thread pool and return a float32
+    (dates x tickers) frame. Chunks that fail are skipped with a warning.
+
+    `timeout` bounds each HTTP request (a chunk fetches its tickers one by
+    one), `deadline` the whole call: once it passes, queued chunks are
+    cancelled and unfinished ones dropped. A chunk already in flight can't
+    be interrupted; its thread finishes in the background and its result
+    is discarded.
+    """
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+    frames = []
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(_download_chunk, chunk, start_date, timeout) for chunk in chunks]
+        ends_at = time.monotonic() + deadline
+        for chunk, future in zip(chunks, futures):
+            try:
+                frames.append(future.result(timeout=max(0.0, ends_at - time.monotonic())))
+            except FuturesTimeoutError:
+                for pending in futures:
+                    pending.cancel()
+                print(f"Warning: Breadth download missed the {deadline}s deadline for {len(chunk)} tickers ({chunk[0]}...)")
+            except CancelledError:
+                print(f"Warning: Breadth download skipped {len(chunk)} tickers ({chunk[0]}...) after the deadline")
+            except Exception as e:
+                print(f"Warning: Breadth download failed for {len(chunk)} tickers ({chunk[0]}...): {e}")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(dtype=np.float32)
+    return pd.concat(frames, axis=1).sort_index()
+
+
+def get_price_gaps(prices, min_coverage=BREADTH_MIN_COVERAGE):
+    """Dates each ticker is missing a price after its first valid one, as a
+    dict of ticker -> DatetimeIndex (tickers without gaps are left out).
+
+    Only days on which at least `min_coverage` of the tickers traded count,
+    so a stray bar for one ticker (e.g. a Saturday print) doesn't mark every
+    other ticker as gapped.
+    """
+    finite = np.isfinite(prices.to_numpy(dtype=np.float64))
+    sessions = finite.sum(axis=1) >= min_coverage * finite.shape[1]
+    gaps = np.maximum.accumulate(finite, axis=0) & ~finite & sessions[:, None]
+    return {
+        ticker: prices.index[gaps[:, i]]
+        for i, ticker in enumerate(prices.columns) if gaps[:, i].any()
+    }
+
+
+def get_revised_tickers(cached, fresh, tolerance=BREADTH_REVISION_TOLERANCE):
+    """Tickers whose freshly downloaded prices no longer match the cached
+    ones on the overlapping days, i.e. whose history Yahoo has re-adjusted
+    (a split or special dividend rescales the whole adjusted series). The
+    median ratio is used so a single revised bar doesn't count.
+    """
+    dates = cached.index.intersection(fresh.index)
+    columns = cached.columns.intersection(fresh.columns)
+    if dates.empty or columns.empty:
+        return []
+    ratio = fresh.loc[dates, columns].astype(np.float64) / cached.loc[dates, columns].astype(np.float64)
+    drift = (ratio.median() - 1).abs()
+    return list(drift.index[drift > tolerance])
+
+
+def load_price_matrix(tickers, start_date, cache_dir=None):
+    """Price matrix for `tickers` from `start_date`, incrementally cached.
+
+    With a cached matrix, only the last BREADTH_REFRESH_OVERLAP_DAYS (plus
+    any tickers not cached yet) are downloaded and merged in; newer values
+    win so late corrections are picked up. Tickers whose overlap prices
+    drifted from the cached ones (a split back-adjusts the whole history)
+    are re-downloaded in full. Cached tickers with holes older than the
+    overlap (e.g. a chunk that failed for several runs) are re-downloaded
+    from their earliest gap, so outages heal once the source recovers. Gap
+    dates already retried are recorded with the cache (`retried_gaps`
+    attr), so holes the source can't fill (halts) are fetched only once.
+    """
+    cache_dir = BREADTH_CACHE_DIR if cache_dir is None else cache_dir
+    path = os.path.join(cache_dir, 'prices.pkl')
+
+    cached = None
+    if os.path.exists(path):
+        try:
+            cached = pd.read_pickle(path)
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable breadth cache {path}: {e}")
+
+    retried_gaps = {}
+    if cached is None or cached.empty or cached.index[0] > pd.Timestamp(start_date):
+        prices = download_price_matrix(tickers, start_date)
+    else:
+        refresh_start = cached.index[-1] - pd.Timedelta(days=BREADTH_REFRESH_OVERLAP_DAYS)
+        recent = download_price_matrix(tickers, refresh_start.strftime('%Y-%m-%d'))
+        revised = get_revised_tickers(cached, recent)
+        if revised:
+            print(f"Breadth cache: re-downloading {len(revised)} re-adjusted tickers ({revised[0]}...) in full")
+            full = download_price_matrix(revised, start_date)
+            # The cached rows are on the old scale; a ticker whose full
+            # re-download failed is dropped so the next run treats it as new.
+            recent = recent.combine_first(full).drop(columns=[t for t in revised if t not in full.columns])
+            cached = cached.drop(columns=revised)
+        new_tickers = [t for t in tickers if t not in cached.columns]
+        if new_tickers:
+            recent = recent.combine_first(download_price_matrix(new_tickers, start_date))
+        gaps = get_price_gaps(cached.loc[cached.index < refresh_start])
+        gaps = {t: dates for t, dates in gaps.items() if t in tickers}
+        previously_retried = cached.attrs.get('retried_gaps', {})
+        unretried = {
+            t: dates.difference(pd.DatetimeIndex(previously_retried.get(t, [])))
+            for t, dates in gaps.items()
+        }
+        unretried = {t: dates for t, dates in unretried.items() if not dates.empty}
+        refetched = []
+        if unretried:
+            gap_start = min(dates[0] for dates in unretried.values())
+            print(f"Breadth cache: re-downloading {len(unretried)} tickers with gaps since {gap_start.date()}")
+            gap_prices = download_price_matrix(list(unretried), gap_start.strftime('%Y-%m-%d'))
+            recent = recent.combine_first(gap_prices)
+            refetched = list(gap_prices.columns)
+        # A gap counts as retried once its ticker actually came back; gaps
+        # from a failed chunk stay unretried so the next run tries again.
+        for t, dates in gaps.items():
+            known = pd.DatetimeIndex(previously_retried.get(t, []))
+            if t in refetched:
+                known = known.union(dates)
+            known = known.intersection(dates)
+            if not known.empty:
+                retried_gaps[t] = [d.strftime('%Y-%m-%d') for d in known]
+        prices = recent.combine_first(cached).astype(np.float32)
+
+    prices = prices.loc[prices.index >= pd.Timestamp(start_date)]
+    prices = prices.reindex(columns=[t for t in tickers if t in prices.columns])
+    prices.attrs = {'retried_gaps': retried_gaps}
+
+    if not prices.empty:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            prices.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not write breadth cache: {e}")
+    return prices
+
+
+def get_pct_above_ma(prices, window=BREADTH_MA_WINDOW, min_coverage=BREADTH_MIN_COVERAGE):
+    """Percent (0-100) of columns whose price is above their own trailing
+    `window`-day mean, computed over the whole matrix at once via cumulative
+    sums. Members are only counted once they have a full window of valid
+    prices; days where fewer than `min_coverage` of the columns qualify are
+    NaN.
+    """
+    values = prices.to_numpy(dtype=np.float64)
+    if values.size == 0 or len(values) < window:
+        return pd.Series(np.nan, index=prices.index)
+
+    finite = np.isfinite(values)
+    csum = np.cumsum(np.where(finite, values, 0.0), axis=0)
+    ccount = np.cumsum(finite, axis=0)
+
+    pad = np.zeros((1, values.shape[1]))
+    window_sum = csum[window - 1:] - np.vstack([pad, csum[:-window]])
+    window_count = ccount[window - 1:] - np.vstack([pad, ccount[:-window]])
+
+    ma = np.full_like(values, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ma[window - 1:] = np.where(window_count == window, window_sum / window, np.nan)
+
+    eligible = finite & np.isfinite(ma)
+    above = eligible & (values > np.where(eligible, ma, np.inf))
+    n_eligible = eligible.sum(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pct = 100.0 * above.sum(axis=1) / n_eligible
+    pct[n_eligible < min_coverage * values.shape[1]] = np.nan
+    return pd.Series(pct, index=prices.index)
+
+
+def fetch_breadth(start_date, calendar):
+    """Percent of S&P 500 members above their 200-day MA, aligned to
+    `calendar`. Prices are fetched BREADTH_LOOKBACK_DAYS earlier than
+    `start_date` so the MA is warm from the first day, and breadth covers
+    the same history as the other Sentiment inputs. All-NaN if the
+    universe or prices are unavailable.
+    """
+    print("Fetching market breadth data...")
+    try:
+        tickers = get_universe()
+        if not tickers:
+            return pd.Series(np.nan, index=calendar)
+        lookback_start = pd.Timestamp(start_date) - pd.offsets.BDay(BREADTH_LOOKBACK_DAYS)
+        prices = load_price_matrix(tickers, lookback_start.strftime('%Y-%m-%d'))
+        print(f"Breadth universe: {prices.shape[1]}/{len(tickers)} tickers")
+        # No ffill here: compute_indices bounds how long a reading is reused.
+        return get_pct_above_ma(prices).reindex(calendar)
+    except Exception as e:
+        print(f"Warning: Could not compute market breadth: {e}")
+        return pd.Series(np.nan, index=calendar)
@@ -0,0 +1,89 @@
+"""One-time migration: re-date daily-cron records from the run date to the
+trading session they describe.
+
+Before records were dated by trading day, the 00:00 UTC cron stamped each
+row with `datetime.now()`. That run sees the previous US session's close, so
+every cron row sits one calendar day after its session, and weekend/holiday
+runs produced phantom rows repeating the last session. This script shifts
+every record dated on or after `SINCE` to the previous NYSE session and keeps
+only the latest run per session. Records before `SINCE` (written by
+backfill_indices.py) are already dated by session and are left untouched.
+
+Run once, from the repo root:
+    python scripts/migrate_run_dated_records.py 2026-06-20
+
+`SINCE` is the first run-dated record, i.e. the day after the last backfill.
+A full `backfill_indices.py` run is the complete alternative: it rewrites
+every record from scratch with session dates.
+"""
+import json
+import sys
+
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+)
+from pandas.tseries.offsets import CustomBusinessDay
+
+from update_indices import DATA_PATH, write_snapshot
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    rules = [
+        Holiday('New Years Day', month=1, day=1, observance=nearest_workday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday('Juneteenth', month=6, day=19, start_date='2022-01-01', observance=nearest_workday),
+        Holiday('Independence Day', month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday('Christmas', month=12, day=25, observance=nearest_workday),
+    ]
+
+
+NYSE_SESSION = CustomBusinessDay(calendar=NYSEHolidayCalendar())
+
+
+def migrate_records(records, since):
+    """Return `records` with every row dated on or after `since` moved to the
+    previous NYSE session (the one its 00:00 UTC run actually saw), keeping
+    the latest run when several rows map to the same session.
+    """
+    by_date = {}
+    for record in records:
+        if record[0] >= since:
+            session = pd.Timestamp(record[0]) - NYSE_SESSION
+            record = [session.strftime("%Y-%m-%d")] + list(record[1:])
+        # Later rows (later runs) overwrite earlier ones for the same session.
+        by_date[record[0]] = record
+    return [by_date[d] for d in sorted(by_date)]
+
+
+def migrate(since):
+    with open(DATA_PATH, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+
+    migrated = migrate_records(records, since)
+
+    with open(DATA_PATH, 'w', encoding='utf-8') as f:
+        json.dump(migrated, f, separators=(',', ':'))
+    write_snapshot()
+
+    print(f"Migrated {DATA_PATH}: {len(records)} -> {len(migrated)} records (run-dated from {since})")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python scripts/migrate_run_dated_records.py <first run-dated YYYY-MM-DD>")
+        exit(1)
+    migrate(sys.argv[1])
@@ -1,19 +1,115 @@
+import numpy as np
 import pandas as pd
 import yfinance as yf
 from fredapi import Fred
+import hashlib
 import json
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
+import market_breadth
+
 # 1. Configuration
 FRED_API_KEY = os.environ.get('FRED_API_KEY')
 DATA_PATH = 'data/market_indices.json'
+FRESHNESS_PATH = 'data/source_freshness.json'  # last-seen source metadata for the pre-flight check
+FRESHNESS_TICKER_ROLE = 'Equity'  # each universe's broad-market bar date stands in for "new Yahoo data"
+SNAPSHOT_PATH = 'data/snapshot.json'  # tiny first-paint snapshot read by src/index.js before the full history
+SNAPSHOT_TRAIL_LENGTH = 60  # matches `trailLength` of the Macro Regime scatter in src/index.js
+SNAPSHOT_SPARKLINE_POINTS = 30
+SNAPSHOT_SPARKLINE_SIZE = (100, 30)  # SVG viewBox width/height of each sparkline path
 Z_SCORE_WINDOW = 252  # 1 year for Z-Scores
 SENTIMENT_WINDOW = 504 # 2 years for Min-Max Scaling (Sentiment)
 INFLATION_ROC_PERIOD = 63  # 1 quarter for Inflation Rate-of-Change (was 252/1yr — too slow to react)
 GROWTH_RATIO_ROC_PERIOD = 63  # Cyc/Def ratio is Z-scored on its RoC, not its raw level (see Z_Ratio below)
 EMA_SPAN = 10  # EMA smoothing span applied to final Growth/Inflation composites
 REGIME_TRANSITION_DAYS = 3  # consecutive days required before a regime label officially flips
+BREADTH_MAX_STALE_DAYS = 5  # carry the last breadth reading forward at most this many trading days
+
+# Universes: each maps the pipeline's input roles onto its own Yahoo tickers
+# and FRED series. Every universe gets Growth/Inflation/Sentiment/regime
+# computed in the same run and written to its own `output_path`; fetches are
+# shared and deduplicated across universes. To add a region, copy US_UNIVERSE
+# and swap in that region's sector baskets, broad-market/bond/vol tickers and
+# FRED series (every FRED id also needs a FRED_RELEASE_LAG_DAYS entry).
+# `breadth` names the index whose members feed the breadth Sentiment component
+# (one of BREADTH_INDICES) or is None; set it explicitly on every universe,
+# since a copy of US_UNIVERSE would otherwise inherit S&P 500 breadth.
+US_UNIVERSE = {
+    'output_path': DATA_PATH,
+    'cyclical': ['XLY', 'XLI', 'XLB', 'XLK'],
+    'defensive': ['XLP', 'XLV', 'XLU'],
+    'tickers': {
+        'Commodity': 'DBC',
+        'Equity': 'SPY',
+        'Bond': 'TLT',
+        'Volatility': '^VIX',
+        'Copper': 'HG=F',
+        'Gold': 'GC=F',
+        'High_Beta': 'SPHB',
+        'Low_Vol': 'SPLV',
+    },
+    'fred': {
+        'PMI': 'IPMAN',             # Industrial Production
+        'T5YIFR': 'T5YIFR',         # 5Y Inflation Expectation
+        'WALCL': 'WALCL',           # Fed Assets
+        'TGA': 'WTREGEN',           # TGA
+        'RRP': 'RRPONTSYD',         # Reverse Repo
+        'Junk_Spread': 'BAMLH0A0HYM2',
+        'DGS10': 'DGS10',
+        'DGS2': 'DGS2',
+        'ICSA': 'ICSA',             # Initial Jobless Claims (Phase 2, T2.2)
+    },
+    'breadth': 'sp500',
+}
+UNIVERSES = {
+    'us': US_UNIVERSE,
+    # Custom sector split: rate/commodity-sensitive cyclicals vs. defensives.
+    'us_value_cyclicals': dict(
+        US_UNIVERSE,
+        output_path='data/market_indices_us_value_cyclicals.json',
+        cyclical=['XLF', 'XLE', 'XLI', 'XLB'],
+        defensive=['XLP', 'XLV', 'XLU', 'XLRE'],
+        breadth='sp500',
+    ),
+}
+BREADTH_INDICES = ('sp500',)  # indices market_breadth.fetch_breadth can compute breadth for
+CRITICAL_TICKER_ROLES = ('Equity', 'Volatility')  # universe is skipped without these
+OPTIONAL_FRED_ROLES = ('ICSA',)  # universe still runs (degraded) without these
+
+# Derived-frame cache: computed `valid_df` keyed on the aligned raw inputs +
+# formula parameters. Bump PIPELINE_VERSION whenever compute_indices' logic
+# changes in a way the parameters below don't capture.
+PIPELINE_VERSION = 3
+DERIVED_CACHE_DIR = os.environ.get('DERIVED_CACHE_DIR', '.cache/derived')
+DERIVED_CACHE_MAX_ENTRIES = 8  # least-recently-used entries beyond this are evicted
+
+# Block bootstrap for Growth/Inflation confidence bands and quadrant probabilities
+BOOTSTRAP_SAMPLES = 2000  # Monte Carlo draws per day
+BOOTSTRAP_BLOCK_LENGTH = 2 * EMA_SPAN  # residual block length (covers ~98% of the EMA weight)
+BOOTSTRAP_MIN_BLOCKS = 20  # past blocks required before a day gets bands
+BOOTSTRAP_BAND = (0.05, 0.95)  # lower/upper quantiles reported as the band
+BOOTSTRAP_SEED = 42
+
+# Publication lag (business days) from a FRED observation date to the first
+# trading day whose 00:00 UTC cron run can actually see the value. FRED stamps
+# weekly/monthly series on the period they describe, and posts most daily
+# series the business day after the observation, so aligning on the
+# observation date leaks not-yet-published data into backfilled history.
+FRED_RELEASE_LAG_DAYS = {
+    'IPMAN': 33,         # Industrial Production (monthly, dated the 1st, G.17 released mid next month)
+    'T5YIFR': 1,         # H.15-derived, posted on FRED the next business day
+    'WALCL': 1,          # H.4.1: Wednesday level, released Thursday
+    'WTREGEN': 1,        # H.4.1: Wednesday level, released Thursday
+    'RRPONTSYD': 0,      # NY Fed publishes the same afternoon
+    'BAMLH0A0HYM2': 1,   # ICE BofA spread, posted the next morning
+    'DGS10': 1,          # H.15, posted on FRED the next business day
+    'DGS2': 1,           # H.15, posted on FRED the next business day
+    'ICSA': 4,           # week ending Saturday, released the following Thursday
+}
 
 def get_z_score(series, window):
     """Calculate Z-Score using rolling mean and std"""
@@ -69,6 +165,136 @@ def get_regime_label(growth_series, inflation_series, buffer_days=REGIME_TRANSIT
 
     return buffered
 
+def get_bootstrap_bands(df, n_samples=BOOTSTRAP_SAMPLES, seed=BOOTSTRAP_SEED,
+                        block_length=BOOTSTRAP_BLOCK_LENGTH, span=EMA_SPAN):
+    """Moving-block bootstrap of the component z-score noise behind
+    Growth_Index/Inflation_Index.
+
+    Each component's noise is its residual around its own `span`-day EMA,
+    combined with the same weights as the composites (Growth: nan-mean of
+    Z_PMI/Z_Ratio/Z_ICSA, Inflation: 0.5 * Z_T5YIFR + 0.5 * Z_Commodity).
+    A bootstrap draw replaces the last `block_length` days of noise with a
+    contiguous block from the past, pushed through the final EMA weights:
+    the day's own realized shock (its trailing block) is subtracted from the
+    composite and the drawn block's shock added instead, so the bands are
+    centred on the de-noised level rather than on the point estimate. The
+    same block start is used for both axes so their correlation is kept.
+    Because the EMA is linear, every block's effect is precomputed once and
+    all days x `n_samples` draws are a single gather. Only blocks that end on
+    or before a day are eligible for it, so backfilled bands are
+    point-in-time. Days with fewer than BOOTSTRAP_MIN_BLOCKS past blocks
+    get NaN.
+
+    Returns a DataFrame aligned to `df.index` with Growth_Lower/Upper,
+    Inflation_Lower/Upper (BOOTSTRAP_BAND quantiles) and Prob_Overheat,
+    Prob_Stagflation, Prob_Deflation, Prob_Reflation.
+    """
+    residuals = df[['Z_PMI', 'Z_Ratio', 'Z_ICSA', 'Z_T5YIFR', 'Z_Commodity']]
+    residuals = residuals - residuals.apply(get_ema, span=span)
+    growth_noise = residuals[['Z_PMI', 'Z_Ratio', 'Z_ICSA']].mean(axis=1, skipna=True).to_numpy(dtype=float)
+    inflation_noise = (0.5 * residuals['Z_T5YIFR'] + 0.5 * residuals['Z_Commodity']).to_numpy(dtype=float)
+
+    columns = [
+        'Growth_Lower', 'Growth_Upper', 'Inflation_Lower', 'Inflation_Upper',
+        'Prob_Overheat', 'Prob_Stagflation', 'Prob_Deflation', 'Prob_Reflation',
+    ]
+    bands = pd.DataFrame(np.nan, index=df.index, columns=columns)
+    if len(df) < block_length:
+        return bands
+
+    # EMA weight on the noise k days before the current day, oldest first to
+    # line up with sliding_window_view's window order.
+    alpha = 2.0 / (span + 1)
+    weights = (alpha * (1 - alpha) ** np.arange(block_length))[::-1]
+    # Shock of the block starting at each position (block s ends on day s + block_length - 1).
+    growth_block_shock = np.lib.stride_tricks.sliding_window_view(growth_noise, block_length) @ weights
+    inflation_block_shock = np.lib.stride_tricks.sliding_window_view(inflation_noise, block_length) @ weights
+
+    valid = np.isfinite(growth_block_shock) & np.isfinite(inflation_block_shock)
+    growth_shock = growth_block_shock[valid]
+    inflation_shock = inflation_block_shock[valid]
+    block_end = np.flatnonzero(valid) + block_length - 1
+
+    # Number of eligible (already completed) blocks for each day, and whether
+    # the day's own trailing block (the realized shock to replace) is valid.
+    days = np.arange(len(df))
+    n_blocks = np.searchsorted(block_end, days, side='right')
+    own_block = days - (block_length - 1)
+    has_own_block = np.zeros(len(df), dtype=bool)
+    has_own_block[own_block >= 0] = valid[own_block[own_block >= 0]]
+    rows = np.flatnonzero((n_blocks >= BOOTSTRAP_MIN_BLOCKS) & has_own_block)
+    if len(rows) == 0:
+        return bands
+
+    rng = np.random.default_rng(seed)
+    draws = (rng.random((len(rows), n_samples)) * n_blocks[rows, None]).astype(np.intp)
+
+    growth_base = df['Growth_Index'].to_numpy(dtype=float)[rows] - growth_block_shock[own_block[rows]]
+    inflation_base = df['Inflation_Index'].to_numpy(dtype=float)[rows] - inflation_block_shock[own_block[rows]]
+    growth = growth_base[:, None] + growth_shock[draws]
+    inflation = inflation_base[:, None] + inflation_shock[draws]
+
+    lo, hi = BOOTSTRAP_BAND
+    growth_q = np.quantile(growth, [lo, hi], axis=1)
+    inflation_q = np.quantile(inflation, [lo, hi], axis=1)
+    growth_up = growth >= 0
+    inflation_up = inflation >= 0
+
+    bands.iloc[rows] = np.column_stack([
+        growth_q[0], growth_q[1], inflation_q[0], inflation_q[1],
+        (growth_up & inflation_up).mean(axis=1),
+        (~growth_up & inflation_up).mean(axis=1),
+        (~growth_up & ~inflation_up).mean(axis=1),
+        (growth_up & ~inflation_up).mean(axis=1),
+    ])
+    return bands
+
+def align_fred_series(series_by_id, calendar, release_lags=None):
+    """As-of align several FRED series onto a trading calendar.
+
+    Each observation is re-stamped on its release date (observation date +
+    `release_lags[series_id]` business days), then every trading day takes
+    the latest value released on or before it (the last one if several share
+    a release date). Each series is one `searchsorted` of the calendar into
+    its release dates, written straight into a single preallocated
+    (calendar x series) array; no daily resample or intermediate frames.
+    Returns a DataFrame indexed by `calendar` with one column per FRED id in
+    `release_lags` (all-NaN for ids missing from `series_by_id` or passed as
+    None).
+    """
+    if release_lags is None:
+        release_lags = FRED_RELEASE_LAG_DAYS
+
+    columns = list(dict.fromkeys(list(release_lags) + list(series_by_id)))
+    calendar_values = pd.DatetimeIndex(calendar).to_numpy(dtype='datetime64[ns]')
+    aligned = np.full((len(calendar_values), len(columns)), np.nan)
+
+    for j, series_id in enumerate(columns):
+        series = series_by_id.get(series_id)
+        if series is None:
+            continue
+        series = series.dropna()
+        if series.empty:
+            continue
+
+        # Same result as `+ pd.offsets.BDay(lag)` (weekend dates count the
+        # roll to the next business day as the first step), ~10x faster.
+        lag = release_lags.get(series_id, 0)
+        released = np.busday_offset(
+            pd.DatetimeIndex(series.index).to_numpy(dtype='datetime64[D]'),
+            lag, roll='backward' if lag > 0 else 'forward',
+        ).astype('datetime64[ns]')
+        values = series.to_numpy(dtype=float)
+        if not (released[1:] >= released[:-1]).all():
+            order = np.argsort(released, kind='stable')
+            released, values = released[order], values[order]
+
+        pos = np.searchsorted(released, calendar_values, side='right') - 1
+        known = pos >= 0
+        aligned[known, j] = values[pos[known]]
+
+    return pd.DataFrame(aligned, index=calendar, columns=columns)
+
 def get_min_max_score(series, window, inverse=False):
     """
     Calculate Min-Max Score (0-100) based on rolling window.
@@ -88,135 +314,295 @@ def get_min_max_score(series, window, inverse=False):
         
     return score
 
+def get_formula_params():
+    """Every formula constant that shapes `compute_indices`' output, read at
+    call time so a changed (or monkeypatched) constant changes the cache key.
+    """
+    return {
+        'pipeline_version': PIPELINE_VERSION,
+        'z_score_window': Z_SCORE_WINDOW,
+        'sentiment_window': SENTIMENT_WINDOW,
+        'inflation_roc_period': INFLATION_ROC_PERIOD,
+        'growth_ratio_roc_period': GROWTH_RATIO_ROC_PERIOD,
+        'ema_span': EMA_SPAN,
+        'regime_transition_days': REGIME_TRANSITION_DAYS,
+        'breadth_max_stale_days': BREADTH_MAX_STALE_DAYS,
+        'bootstrap_samples': BOOTSTRAP_SAMPLES,
+        'bootstrap_block_length': BOOTSTRAP_BLOCK_LENGTH,
+        'bootstrap_min_blocks': BOOTSTRAP_MIN_BLOCKS,
+        'bootstrap_band': list(BOOTSTRAP_BAND),
+        'bootstrap_seed': BOOTSTRAP_SEED,
+    }
+
+def get_derived_cache_key(raw_df):
+    """SHA-256 over the aligned raw input frame (values, index and column
+    names) plus `get_formula_params()`.
+    """
+    h = hashlib.sha256()
+    h.update(pd.util.hash_pandas_object(raw_df, index=True).to_numpy().tobytes())
+    h.update(json.dumps([str(c) for c in raw_df.columns]).encode('utf-8'))
+    h.update(json.dumps(get_formula_params(), sort_keys=True).encode('utf-8'))
+    return h.hexdigest()
+
+def _touch(path):
+    """Stamp `path` with a nanosecond mtime; filesystem-assigned mtimes are
+    too coarse to order entries written/read in quick succession.
+    """
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+def compute_indices_cached(raw_df, cache_dir=None, max_entries=None):
+    """`compute_indices(raw_df)`, memoized on disk under `cache_dir`.
+
+    A hit returns the stored frame and refreshes its mtime; a miss computes,
+    stores the result and evicts the least-recently-used entries beyond
+    `max_entries`. Unreadable entries are treated as misses. None results
+    (validation failures) are never cached.
+    """
+    cache_dir = DERIVED_CACHE_DIR if cache_dir is None else cache_dir
+    max_entries = DERIVED_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+
+    key = get_derived_cache_key(raw_df)
+    path = os.path.join(cache_dir, f"{key}.pkl")
+
+    if os.path.exists(path):
+        try:
+            valid_df = pd.read_pickle(path)
+            _touch(path)
+            print(f"Using cached derived frame {key[:12]}")
+            return valid_df
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable cache entry {path}: {e}")
+
+    valid_df = compute_indices(raw_df)
+    if valid_df is None:
+        return None
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        valid_df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        _touch(path)
+
+        entries = sorted(
+            (os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if name.endswith('.pkl')),
+            key=os.path.getmtime,
+            reverse=True,
+        )
+        for stale in entries[max_entries:]:
+            os.remove(stale)
+    except OSError as e:
+        # The cache is an optimization only; never fail the pipeline over it.
+        print(f"Warning: Could not write derived cache: {e}")
+
+    return valid_df
+
 def compute_index_dataframe(fred):
-    """Fetch raw data and compute every index column for the full history.
+    """Fetch raw data and compute every index column for the full history
+    of the US universe.
 
     Returns the full `valid_df` (one row per trading day with a complete
-    set of indices), or None if fetching/validation failed. Shared by
-    `fetch_market_data` (latest day only, used by the daily cron) and
-    `backfill_indices.py` (every historical day, used for one-time
-    formula-revision backfills) so both always run identical logic.
+    set of indices), or None if fetching/validation failed. Used by
+    `fetch_market_data` (latest day only); the daily cron and
+    `backfill_indices.py` go through `compute_universe_dataframes` so every
+    universe runs identical logic.
+    Repeated runs on unchanged inputs and formula constants are served from
+    the derived-frame cache (see `compute_indices_cached`).
+    """
+    return compute_universe_dataframes(fred, {'us': UNIVERSES['us']})['us']
+
+def compute_universe_dataframes(fred, universes=None):
+    """`valid_df` for every universe (None for those that failed), computed
+    from one shared fetch. With more than one universe the compute stage runs
+    on a process pool, so wall time grows with the fetch (shared) rather than
+    with the number of universes.
+    """
+    universes = UNIVERSES if universes is None else universes
+    raw_frames = fetch_aligned_inputs(fred, universes)
+    if raw_frames is None:
+        return {name: None for name in universes}
+
+    pending = {name: raw_df for name, raw_df in raw_frames.items() if raw_df is not None}
+    results = {name: None for name in universes}
+
+    if len(pending) <= 1:
+        for name, raw_df in pending.items():
+            results[name] = compute_indices_cached(raw_df)
+        return results
+
+    # Spawn rather than fork: a breadth download that overran its deadline
+    # may still be running on a background thread. Pass the cache dir
+    # explicitly: spawned workers don't inherit runtime changes to module
+    # globals.
+    with ProcessPoolExecutor(
+        max_workers=min(len(pending), os.cpu_count() or 1),
+        mp_context=multiprocessing.get_context('spawn'),
+    ) as executor:
+        futures = {
+            name: executor.submit(compute_indices_cached, raw_df, DERIVED_CACHE_DIR)
+            for name, raw_df in pending.items()
+        }
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"Error computing universe {name}: {e}")
+    return results
+
+def fetch_aligned_inputs(fred, universes=None):
+    """Stages A-B: fetch FRED + Yahoo Finance data for every universe and
+    align it onto the trading calendar. Each ticker and FRED series is
+    fetched once, however many universes share it. Returns a dict of
+    universe name -> raw input frame (role-named columns, see UNIVERSES), with
+    None for universes whose critical inputs are missing; None overall if
+    the Yahoo download itself failed.
     """
+    universes = UNIVERSES if universes is None else universes
+
     # --- A. Data Collection Setup (Last 3 years to ensure 2-year lookback) ---
     start_date = (datetime.now() - timedelta(days=365*3)).strftime('%Y-%m-%d')
     
-    # 1. Fetch FRED Data
+    # 1. Fetch FRED Data (deduplicated across universes). A failed series only
+    # disables the universes that require it; optional roles (ICSA) degrade
+    # gracefully instead (Growth_Index falls back to its other inputs).
     print("Fetching FRED data...")
-    try:
-        # Macro
-        pmi_series = fred.get_series('IPMAN', observation_start=start_date) # Industrial Production
-        inf_exp_series = fred.get_series('T5YIFR', observation_start=start_date) # 5Y Inflation Expectation
-        
-        # Liquidity
-        walcl = fred.get_series('WALCL', observation_start=start_date) # Fed Assets
-        tga = fred.get_series('WTREGEN', observation_start=start_date) # TGA
-        rrp = fred.get_series('RRPONTSYD', observation_start=start_date) # Reverse Repo
-        
-        # Sentiment Components (FRED)
-        junk_spread = fred.get_series('BAMLH0A0HYM2', observation_start=start_date)
-        
-        # Leading Components (FRED)
-        yield10 = fred.get_series('DGS10', observation_start=start_date)
-        yield2 = fred.get_series('DGS2', observation_start=start_date)
-
-    except Exception as e:
-        print(f"Error fetching FRED data: {e}")
-        return None
-
-    # Growth: Initial Jobless Claims (weekly, timely growth signal — Phase 2, T2.2).
-    # Fetched separately with its own guard so a single missing/unavailable
-    # series degrades gracefully (Growth_Index falls back to its other
-    # inputs) instead of aborting the whole pipeline run.
-    try:
-        icsa_series = fred.get_series('ICSA', observation_start=start_date) # Initial Jobless Claims
-    except Exception as e:
-        print(f"Warning: Could not fetch ICSA (Initial Jobless Claims): {e}")
-        icsa_series = None
+    fred_ids = list(dict.fromkeys(sid for spec in universes.values() for sid in spec['fred'].values()))
+    fred_raw = {}
+    for series_id in fred_ids:
+        try:
+            fred_raw[series_id] = fred.get_series(series_id, observation_start=start_date)
+        except Exception as e:
+            print(f"Warning: Could not fetch FRED series {series_id}: {e}")
+            fred_raw[series_id] = None
     
-    # 2. Fetch Yahoo Finance Data
+    # 2. Fetch Yahoo Finance Data (deduplicated across universes)
     print("Fetching Yahoo Finance data...")
-    tickers = [
-        'XLY', 'XLI', 'XLB', 'XLK', 'XLP', 'XLV', 'XLU', 'DBC', 
-        'SPY', 'TLT', '^VIX',
-        'HG=F', 'GC=F', 'SPHB', 'SPLV'
-    ]
+    tickers = list(dict.fromkeys(t for spec in universes.values() for t in get_universe_tickers(spec)))
 
     data = yf.download(tickers, start=start_date, progress=False, threads=False)
+    if data is None or data.empty:
+        print("Error: Yahoo Finance download returned no data.")
+        return None
 
     if isinstance(data.columns, pd.MultiIndex):
         if 'Adj Close' in data.columns.get_level_values(0):
-            df = data['Adj Close']
+            prices = data['Adj Close']
         else:
-            df = data['Close']
+            prices = data['Close']
     else:
-        df = data['Adj Close'] if 'Adj Close' in data.columns else data
+        prices = data['Adj Close'] if 'Adj Close' in data.columns else data
 
-    required_tickers = ['XLY', 'XLI', 'XLB', 'XLK', 'XLP', 'XLV', 'XLU', 'DBC', 'SPY', 'TLT', '^VIX']
-    leading_tickers = ['HG=F', 'GC=F', 'SPHB', 'SPLV']
-    all_required = required_tickers + leading_tickers
-    
-    missing = [t for t in all_required if t not in df.columns]
-    
-    if missing:
-        print(f"Warning: Missing data for tickers: {missing}")
-        if 'SPY' in missing or '^VIX' in missing:
-             print("Critical tickers missing for Sentiment Index. Aborting.")
-             return None
-    
     # --- B. Preprocessing & Merging ---
-    df.index = df.index.normalize()
-    
-    # FRED Data Merge
-    df['PMI'] = pmi_series.resample('D').ffill().reindex(df.index).ffill()
-    df['T5YIFR'] = inf_exp_series.reindex(df.index).ffill()
-    
-    s_walcl = walcl.resample('D').ffill().reindex(df.index).ffill()
-    s_tga = tga.resample('D').ffill().reindex(df.index).ffill()
-    s_rrp = rrp.reindex(df.index).ffill()
-    
-    df['Junk_Spread'] = junk_spread.reindex(df.index).ffill()
-    df['DGS10'] = yield10.reindex(df.index).ffill()
-    df['DGS2'] = yield2.reindex(df.index).ffill()
+    prices.index = prices.index.normalize()
 
-    if icsa_series is not None:
-        df['ICSA'] = icsa_series.resample('D').ffill().reindex(df.index).ffill()
-    else:
-        df['ICSA'] = float('nan')
+    # FRED Data Merge: one as-of join onto the trading calendar, with each
+    # series stamped on its release date (see FRED_RELEASE_LAG_DAYS) so
+    # backfilled history only sees data that was public on that day.
+    fred_aligned = align_fred_series(fred_raw, prices.index)
+
+    # Market breadth (% of S&P 500 members above their 200-day MA), fetched
+    # once for every universe whose `breadth` is 'sp500'. All-NaN when
+    # unavailable; Sentiment_Index then falls back to its other inputs.
+    breadth = None
+    if any(spec['breadth'] == 'sp500' for spec in universes.values()):
+        breadth = market_breadth.fetch_breadth(start_date, prices.index)
+
+    raw_frames = {}
+    for name, spec in universes.items():
+        if spec['breadth'] is not None and spec['breadth'] not in BREADTH_INDICES:
+            print(f"Warning [{name}]: No breadth source for index {spec['breadth']!r}; running without breadth.")
+        raw_frames[name] = build_universe_inputs(
+            name, spec, prices, fred_aligned, breadth if spec['breadth'] == 'sp500' else None
+        )
+    return raw_frames
+
+def get_universe_tickers(spec):
+    """Every Yahoo ticker a universe spec references."""
+    return list(spec['cyclical']) + list(spec['defensive']) + list(spec['tickers'].values())
+
+def build_universe_inputs(name, spec, prices, fred_aligned, breadth=None):
+    """Slice one universe's role-named raw input frame out of the shared
+    price matrix and aligned FRED frame. Returns None if a critical ticker
+    role or a required FRED series is missing.
+
+    The shared matrix is indexed on every ticker's trading days (futures,
+    other regions), so the frame is restricted to the sessions of the
+    universe's own Equity ticker: no phantom rows on days its market was
+    closed, and row-count windows count its own trading days.
+    """
+    missing = [t for t in get_universe_tickers(spec) if t not in prices.columns]
+    if missing:
+        print(f"Warning [{name}]: Missing data for tickers: {missing}")
+        if any(spec['tickers'][role] in missing for role in CRITICAL_TICKER_ROLES):
+            print(f"Critical tickers missing for Sentiment Index [{name}]. Skipping universe.")
+            return None
+
+    missing_fred = [
+        sid for role, sid in spec['fred'].items()
+        if role not in OPTIONAL_FRED_ROLES and fred_aligned[sid].isna().all()
+    ]
+    if missing_fred:
+        print(f"Error [{name}]: Missing FRED data for {missing_fred}. Skipping universe.")
+        return None
+
+    sessions = prices.index[prices[spec['tickers']['Equity']].notna()]
+    prices = prices.loc[sessions]
+    fred_aligned = fred_aligned.loc[sessions]
+
+    df = pd.DataFrame(index=sessions)
+    basket = prices.reindex(columns=list(spec['cyclical']) + list(spec['defensive']))
+    df['Cyclical'] = sum(basket[t] for t in spec['cyclical'])
+    df['Defensive'] = sum(basket[t] for t in spec['defensive'])
+
+    for role, ticker in spec['tickers'].items():
+        df[role] = prices[ticker] if ticker in prices.columns else float('nan')
+
+    for role, series_id in spec['fred'].items():
+        df[role] = fred_aligned[series_id]
+
+    df['Breadth_Pct_Above_MA'] = breadth.reindex(sessions) if breadth is not None else float('nan')
+    return df
+
+def compute_indices(raw_df):
+    """Stages C-E: compute every index column from the aligned raw inputs
+    produced by `fetch_aligned_inputs`. Pure function of `raw_df` and the
+    formula constants, which is what makes it safe to cache. Returns
+    `valid_df`, or None if there is not enough data.
+    """
+    df = raw_df.copy()
 
     # --- C. Index Calculation ---
     
     # 1. Macro
-    cyclical = df['XLY'] + df['XLI'] + df['XLB'] + df['XLK']
-    defensive = df['XLP'] + df['XLV'] + df['XLU']
-    df['Cyc_Def_Ratio'] = cyclical / defensive
+    df['Cyc_Def_Ratio'] = df['Cyclical'] / df['Defensive']
     
     # 2. Liquidity
-    df['Net_Liquidity_Raw'] = s_walcl - s_tga - s_rrp
+    df['Net_Liquidity_Raw'] = df['WALCL'] - df['TGA'] - df['RRP']
 
     # 3. Composite Sentiment
-    spy_125ma = df['SPY'].rolling(window=125).mean()
-    df['Sent_Momentum_Raw'] = (df['SPY'] - spy_125ma) / spy_125ma
-    df['Sent_VIX_Raw'] = df['^VIX']
+    equity_125ma = df['Equity'].rolling(window=125).mean()
+    df['Sent_Momentum_Raw'] = (df['Equity'] - equity_125ma) / equity_125ma
+    df['Sent_VIX_Raw'] = df['Volatility']
     
-    spy_ret_20 = df['SPY'].pct_change(20)
-    tlt_ret_20 = df['TLT'].pct_change(20)
-    df['Sent_SafeHaven_Raw'] = spy_ret_20 - tlt_ret_20
+    equity_ret_20 = df['Equity'].pct_change(20)
+    bond_ret_20 = df['Bond'].pct_change(20)
+    df['Sent_SafeHaven_Raw'] = equity_ret_20 - bond_ret_20
     
     # 4. Leading
-    if 'HG=F' in df.columns and 'GC=F' in df.columns:
-        df['Lead_CopperGold_Raw'] = df['HG=F'] / df['GC=F']
-    else:
-        df['Lead_CopperGold_Raw'] = pd.NA
-        
-    if 'SPHB' in df.columns and 'SPLV' in df.columns:
-        df['Lead_BetaVol_Raw'] = df['SPHB'] / df['SPLV']
-    else:
-        df['Lead_BetaVol_Raw'] = pd.NA
+    # Missing leading tickers arrive as all-NaN columns (see build_universe_inputs).
+    df['Lead_CopperGold_Raw'] = df['Copper'] / df['Gold']
+    df['Lead_BetaVol_Raw'] = df['High_Beta'] / df['Low_Vol']
         
     df['Lead_YieldSpread_Raw'] = df['DGS10'] - df['DGS2']
 
     # --- D. Normalization ---
+    # Breadth gets a bounded carry-forward instead of the unlimited one below:
+    # a failed breadth fetch should briefly reuse the last reading, not freeze
+    # it into Sentiment_Index indefinitely.
+    breadth = df['Breadth_Pct_Above_MA'].ffill(limit=BREADTH_MAX_STALE_DAYS)
     df = df.ffill()
+    df['Breadth_Pct_Above_MA'] = breadth
 
     df['Z_PMI'] = get_z_score(df['PMI'], Z_SCORE_WINDOW)
     # Cyc_Def_Ratio is built from raw ETF price levels, which secularly drift
@@ -235,7 +621,7 @@ def compute_index_dataframe(fred):
     # which combined with the 252-day Z-score below caused ~2 years of
     # smoothing before any signal moved (Phase 2, T2.1).
     df['T5YIFR_RoC'] = df['T5YIFR'].pct_change(periods=INFLATION_ROC_PERIOD)
-    df['Commodity_RoC'] = df['DBC'].pct_change(periods=INFLATION_ROC_PERIOD)
+    df['Commodity_RoC'] = df['Commodity'].pct_change(periods=INFLATION_ROC_PERIOD)
     
     # Normalize the RoC (not the absolute level)
     df['Z_T5YIFR'] = get_z_score(df['T5YIFR_RoC'], Z_SCORE_WINDOW)
@@ -251,13 +637,20 @@ def compute_index_dataframe(fred):
     df['Score_VIX'] = get_min_max_score(df['Sent_VIX_Raw'], SENTIMENT_WINDOW, inverse=True)
     df['Score_SafeHaven'] = get_min_max_score(df['Sent_SafeHaven_Raw'], SENTIMENT_WINDOW, inverse=False)
     df['Score_Junk'] = get_min_max_score(df['Junk_Spread'], SENTIMENT_WINDOW, inverse=True)
+    df['Score_Breadth'] = get_min_max_score(df['Breadth_Pct_Above_MA'], SENTIMENT_WINDOW, inverse=False)
 
+    # Equal-weight across the 4 core scores + breadth. Breadth is optional
+    # (large-universe fetch may fail or be partial): skipna so a missing
+    # breadth score falls back to the 4-way average, but the 4 core scores
+    # are still all required for a valid Sentiment_Index. Short outages are
+    # bridged by the bounded carry-forward above, so the index only switches
+    # between the 4- and 5-way average on longer ones (logged below).
+    sentiment_core = ['Score_Momentum', 'Score_VIX', 'Score_SafeHaven', 'Score_Junk']
     df['Sentiment_Index'] = (
-        df['Score_Momentum'] + 
-        df['Score_VIX'] + 
-        df['Score_SafeHaven'] + 
-        df['Score_Junk']
-    ) / 4.0
+        df[sentiment_core + ['Score_Breadth']]
+        .mean(axis=1, skipna=True)
+        .where(df[sentiment_core].notna().all(axis=1))
+    )
     
     df['Leading_Index'] = (
         df['Z_CopperGold'] + 
@@ -286,6 +679,12 @@ def compute_index_dataframe(fred):
         print("Error: Not enough data points.")
         return None
 
+    if raw_df['Breadth_Pct_Above_MA'].notna().any() and pd.isna(valid_df['Score_Breadth'].iloc[-1]):
+        print(
+            f"Warning: No breadth reading within {BREADTH_MAX_STALE_DAYS} days of "
+            f"{valid_df.index[-1].date()}; Sentiment_Index falls back to its 4 core scores."
+        )
+
     # Regime confidence (Euclidean distance from origin) + buffered regime
     # label (Phase 2, T2.4). Computed over the full valid history so the
     # transition buffer has consecutive-day context.
@@ -293,9 +692,23 @@ def compute_index_dataframe(fred):
     valid_df['Regime_Confidence'] = (valid_df['Growth_Index']**2 + valid_df['Inflation_Index']**2) ** 0.5
     valid_df['Regime_Label'] = get_regime_label(valid_df['Growth_Index'], valid_df['Inflation_Index'])
 
+    # Bootstrap confidence bands + per-quadrant probabilities: how likely the
+    # label is to flip given the noise in the component z-scores.
+    bands = get_bootstrap_bands(valid_df)
+    valid_df[bands.columns] = bands
+
     return valid_df
 
 
+def round_or_none(value, ndigits):
+    """Round a value for the JSON record, mapping NaN to None (null) so
+    early-history rows without a bootstrap band still serialize as valid JSON.
+    """
+    if pd.isna(value):
+        return None
+    return round(value, ndigits)
+
+
 def row_to_market_data(row):
     """Convert one row of the `compute_index_dataframe` output into the
     market_data dict shape (same shape `fetch_market_data` used to build
@@ -319,13 +732,23 @@ def row_to_market_data(row):
         "score_vix": round(row['Score_VIX'], 1),
         "score_safehaven": round(row['Score_SafeHaven'], 1),
         "score_junk": round(row['Score_Junk'], 1),
+        "score_breadth": round_or_none(row['Score_Breadth'], 1),
 
         "z_coppergold": round(row['Z_CopperGold'], 2),
         "z_betavol": round(row['Z_BetaVol'], 2),
         "z_yieldspread": round(row['Z_YieldSpread'], 2),
 
         "regime_confidence": round(row['Regime_Confidence'], 2),
-        "regime_label": row['Regime_Label']
+        "regime_label": row['Regime_Label'],
+
+        "growth_lower": round_or_none(row['Growth_Lower'], 2),
+        "growth_upper": round_or_none(row['Growth_Upper'], 2),
+        "inflation_lower": round_or_none(row['Inflation_Lower'], 2),
+        "inflation_upper": round_or_none(row['Inflation_Upper'], 2),
+        "prob_overheat": round_or_none(row['Prob_Overheat'], 3),
+        "prob_stagflation": round_or_none(row['Prob_Stagflation'], 3),
+        "prob_deflation": round_or_none(row['Prob_Deflation'], 3),
+        "prob_reflation": round_or_none(row['Prob_Reflation'], 3)
     }
 
 
@@ -361,15 +784,25 @@ def market_data_to_record(date_str, market_data):
         market_data['z_betavol'],            # 16
         market_data['z_yieldspread'],        # 17
         market_data['regime_confidence'],    # 18 (Phase 2, T2.4)
-        market_data['regime_label']          # 19 (Phase 2, T2.4)
+        market_data['regime_label'],         # 19 (Phase 2, T2.4)
+        market_data['growth_lower'],         # 20 (bootstrap band)
+        market_data['growth_upper'],         # 21
+        market_data['inflation_lower'],      # 22
+        market_data['inflation_upper'],      # 23
+        market_data['prob_overheat'],        # 24 (bootstrap quadrant probability)
+        market_data['prob_stagflation'],     # 25
+        market_data['prob_deflation'],       # 26
+        market_data['prob_reflation'],       # 27
+        market_data['score_breadth']         # 28 (market breadth, null if unavailable)
     ]
 
 
-def update_json_file(new_record_list):
+def update_json_file(new_record_list, data_path=None):
+    data_path = DATA_PATH if data_path is None else data_path
     data = []
-    if os.path.exists(DATA_PATH):
+    if os.path.exists(data_path):
         try:
-            with open(DATA_PATH, 'r', encoding='utf-8') as f:
+            with open(data_path, 'r', encoding='utf-8') as f:
                 loaded = json.load(f)
                 
                 # Check format: If it's a list of dicts (Old format), migrate it
@@ -411,10 +844,148 @@ def update_json_file(new_record_list):
     # Sort by date
     data.sort(key=lambda x: x[0])
 
-    os.makedirs(os.path.dirname(DATA_PATH), exist_ok=True)
-    with open(DATA_PATH, 'w', encoding='utf-8') as f:
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    with open(data_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, separators=(',', ':')) # Minimal separators for smaller file
-    print(f"Updated data for {new_record_list[0]}")
+    print(f"Updated data for {new_record_list[0]} in {data_path}")
+
+def get_sparkline_path(values, size=SNAPSHOT_SPARKLINE_SIZE):
+    """SVG path `d` for a sparkline of `values` scaled into a (width, height)
+    viewBox, with integer coordinates to keep the snapshot small. Missing
+    values are skipped; fewer than two points gives an empty path.
+    """
+    values = [v for v in values if v is not None]
+    if len(values) < 2:
+        return ""
+
+    width, height = size
+    lo, hi = min(values), max(values)
+    span = (hi - lo) or 1
+    points = [
+        f"{round(i * width / (len(values) - 1))},{round(height - (v - lo) / span * height)}"
+        for i, v in enumerate(values)
+    ]
+    return "M" + " ".join(points)
+
+
+def write_snapshot(data_path=None, snapshot_path=None):
+    """Write the first-paint snapshot for the dashboard from the stored
+    history: latest headline values, the Growth/Inflation scatter trail and
+    sparkline paths for the Liquidity/Sentiment/Leading cards. Built from
+    `data_path` (not the in-memory frame) so it always matches what the full
+    charts hydrate to.
+    """
+    data_path = DATA_PATH if data_path is None else data_path
+    snapshot_path = SNAPSHOT_PATH if snapshot_path is None else snapshot_path
+
+    with open(data_path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    if not records:
+        return
+
+    latest = records[-1]
+    recent = records[-SNAPSHOT_SPARKLINE_POINTS:]
+    snapshot = {
+        "date": latest[0],
+        "growth": latest[1],
+        "inflation": latest[2],
+        "liquidity": latest[3],
+        "sentiment": latest[4],
+        "leading": latest[5],
+        "regime_confidence": latest[18] if len(latest) > 18 else None,
+        "regime_label": latest[19] if len(latest) > 19 else None,
+        "trail": [[r[1], r[2]] for r in records[-SNAPSHOT_TRAIL_LENGTH:]],
+        "sparklines": {
+            "liquidity": get_sparkline_path([r[3] for r in recent]),
+            "sentiment": get_sparkline_path([r[4] for r in recent]),
+            "leading": get_sparkline_path([r[5] for r in recent]),
+        },
+    }
+
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    with open(snapshot_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+
+
+def get_source_freshness(fred, universes=None):
+    """Cheap source metadata for the pre-flight check, covering every
+    universe: each FRED series' `last_updated` stamp (one metadata call per
+    series, no observations) and the latest bar date of each universe's
+    FRESHNESS_TICKER_ROLE ticker from one 5-day Yahoo download. A source
+    whose metadata can't be fetched is left out.
+    """
+    universes = UNIVERSES if universes is None else universes
+
+    stamps = {}
+    fred_ids = dict.fromkeys(sid for spec in universes.values() for sid in spec['fred'].values())
+    for series_id in fred_ids:
+        try:
+            stamps[series_id] = str(fred.get_series_info(series_id)['last_updated'])
+        except Exception as e:
+            print(f"Warning: Could not fetch FRED metadata for {series_id}: {e}")
+
+    tickers = list(dict.fromkeys(spec['tickers'][FRESHNESS_TICKER_ROLE] for spec in universes.values()))
+    try:
+        bars = yf.download(tickers, period='5d', progress=False, threads=False)
+        if isinstance(bars.columns, pd.MultiIndex):
+            closes = bars['Close']
+        else:
+            closes = bars[['Close']]
+            closes.columns = tickers[:1]
+        # Per ticker: markets on different holiday calendars have different last bars.
+        for ticker in closes.columns:
+            last_bar = closes[ticker].last_valid_index()
+            if last_bar is not None:
+                stamps[ticker] = last_bar.strftime("%Y-%m-%d")
+    except Exception as e:
+        print(f"Warning: Could not fetch latest bars for {tickers}: {e}")
+
+    return stamps
+
+
+def has_new_source_data(current, universes=None, freshness_path=None):
+    """Pre-flight check: True if any universe's sources have moved since its
+    last stored record, False if the daily pipeline can be skipped.
+
+    Per universe, the latest bar of its FRESHNESS_TICKER_ROLE ticker is
+    compared against the last record's date in its `output_path`, and its
+    FRED `last_updated` stamps against those saved in `freshness_path` by
+    the previous successful run. Fails open — any missing metadata or
+    unreadable state counts as new data.
+    """
+    universes = UNIVERSES if universes is None else universes
+    freshness_path = FRESHNESS_PATH if freshness_path is None else freshness_path
+
+    try:
+        with open(freshness_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return True
+
+    for spec in universes.values():
+        try:
+            with open(spec['output_path'], 'r', encoding='utf-8') as f:
+                last_date = json.load(f)[-1][0]
+        except (OSError, json.JSONDecodeError, IndexError, KeyError, TypeError):
+            return True
+
+        bar_date = current.get(spec['tickers'][FRESHNESS_TICKER_ROLE])
+        if bar_date is None or bar_date > last_date:
+            return True
+
+        for series_id in spec['fred'].values():
+            if series_id not in current or current[series_id] != previous.get(series_id):
+                return True
+
+    return False
+
+
+def save_source_freshness(stamps, freshness_path=None):
+    freshness_path = FRESHNESS_PATH if freshness_path is None else freshness_path
+    os.makedirs(os.path.dirname(freshness_path), exist_ok=True)
+    with open(freshness_path, 'w', encoding='utf-8') as f:
+        json.dump(stamps, f, indent=2, sort_keys=True)
+
 
 if __name__ == "__main__":
     if not FRED_API_KEY:
@@ -423,14 +994,30 @@ if __name__ == "__main__":
         
     try:
         fred = Fred(api_key=FRED_API_KEY)
-        market_data = fetch_market_data(fred)
-        
-        if market_data:
-            new_record = market_data_to_record(datetime.now().strftime("%Y-%m-%d"), market_data)
-            update_json_file(new_record)
-        else:
+
+        # Pre-flight: skip weekends/holidays when no source has published anything.
+        freshness = get_source_freshness(fred)
+        if not has_new_source_data(freshness):
+            print("No new data: no FRED series or Yahoo bar has changed since the last stored record. Skipping update.")
+            exit(0)
+
+        results = compute_universe_dataframes(fred)
+
+        for name, valid_df in results.items():
+            if valid_df is None:
+                print(f"Failed to generate market data for universe {name}.")
+                continue
+            # Date the record by the trading day it describes, not the run
+            # date, so no phantom non-trading-day rows are written.
+            date_str = valid_df.index[-1].strftime("%Y-%m-%d")
+            new_record = market_data_to_record(date_str, row_to_market_data(valid_df.iloc[-1]))
+            update_json_file(new_record, UNIVERSES[name]['output_path'])
+
+        if results.get('us') is None:
             print("Failed to generate market data.")
             exit(1)
+        write_snapshot()
+        save_source_freshness(freshness)
         
     except Exception as e:
         print(f"Critical Error: {e}")
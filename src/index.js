@@ -1,3 +1,52 @@
+// --- First-Paint Snapshot ---
+// data/snapshot.json (written by scripts/update_indices.py) holds the latest
+// headline values, the 60-point scatter trail and sparkline paths. It is tiny,
+// so the Row 1 cards paint right away; createCharts() removes these
+// placeholders once the full Chart.js charts exist (hydration).
+let chartsHydrated = false;
+
+const addSnapshotOverlay = (canvasId, html) => {
+    const canvas = document.getElementById(canvasId);
+    if (!canvas) return;
+    const overlay = document.createElement('div');
+    overlay.className = 'snapshot';
+    overlay.innerHTML = html;
+    canvas.parentElement.appendChild(overlay);
+};
+
+const paintSnapshot = async () => {
+    try {
+        const response = await fetch('/data/snapshot.json');
+        if (!response.ok) return;
+        const snap = await response.json();
+        if (chartsHydrated) return; // Full charts won the race
+
+        document.getElementById('last-updated').textContent = `Last updated: ${snap.date}`;
+
+        // Macro Regime: trail on the same dynamic scale as the scatter chart
+        const scaleMax = Math.ceil(Math.max(...snap.trail.flat().map(Math.abs)) * 2) / 2 || 1;
+        const toPct = v => (50 + 50 * v / scaleMax).toFixed(1);
+        const dots = snap.trail.map(([g, i], k) => {
+            const isCurrent = k === snap.trail.length - 1;
+            return `<circle cx="${toPct(g)}" cy="${toPct(-i)}" r="${isCurrent ? 3 : 1.5}"${isCurrent ? ' class="snapshot-current"' : ''}/>`;
+        }).join('');
+        addSnapshotOverlay('chartMacro',
+            `<div class="snapshot-value">${snap.regime_label ?? ''}</div>` +
+            `<div class="snapshot-meta">Growth ${snap.growth} · Inflation ${snap.inflation} · Confidence ${snap.regime_confidence ?? '-'}</div>` +
+            `<svg viewBox="0 0 100 100" preserveAspectRatio="none"><path class="snapshot-axis" d="M50 0V100M0 50H100"/>${dots}</svg>`);
+
+        // Row 1 line charts: headline value + sparkline
+        const addSparkline = (canvasId, value, path, color) => addSnapshotOverlay(canvasId,
+            `<div class="snapshot-value">${value}</div>` +
+            `<svg viewBox="0 0 100 30" preserveAspectRatio="none"><path class="snapshot-line" stroke="${color}" d="${path}"/></svg>`);
+        addSparkline('chartLiquidity', snap.liquidity, snap.sparklines.liquidity, '#af52de');
+        addSparkline('chartSentiment', snap.sentiment, snap.sparklines.sentiment, '#ff9500');
+        addSparkline('chartLeading', snap.leading, snap.sparklines.leading, '#34c759');
+    } catch (error) {
+        console.error("Snapshot error:", error);
+    }
+};
+
 // --- Chart Logic ---
 async function createCharts() {
     try {
@@ -14,6 +63,10 @@ async function createCharts() {
         // 11: score_momentum, 12: score_vix, 13: score_safehaven, 14: score_junk
         // 15: z_coppergold, 16: z_betavol, 17: z_yieldspread
         // 18: regime_confidence, 19: regime_label (may be undefined on older records)
+        // 20: growth_lower, 21: growth_upper, 22: inflation_lower, 23: inflation_upper
+        // 24: prob_overheat, 25: prob_stagflation, 26: prob_deflation, 27: prob_reflation
+        //     (bootstrap bands/probabilities — undefined on older records, null early in history)
+        // 28: score_breadth (% of S&P 500 above 200-day MA, min-max scored — null if unavailable)
 
         // Update "Last Updated" text
         if (rawData.length > 0) {
@@ -287,6 +340,10 @@ async function createCharts() {
         createComponentChart('chartLeadBV', 16, '#34c759');
         createComponentChart('chartLeadYS', 17, '#34c759');
 
+        // Hydrated: drop the first-paint snapshot placeholders
+        chartsHydrated = true;
+        document.querySelectorAll('.snapshot').forEach(el => el.remove());
+
     } catch (error) {
         console.error("Error:", error);
     }
@@ -354,6 +411,10 @@ const handleLocation = async () => {
 // Handle Browser Back/Forward
 window.addEventListener("popstate", handleLocation);
 
+// Paint the prerendered snapshot immediately — this script sits at the end of
+// <body> and Chart.js is deferred, so this runs before either has to load.
+paintSnapshot();
+
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
     // 1. Intercept navigation links
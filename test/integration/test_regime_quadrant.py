@@ -68,8 +68,15 @@ def _build_synthetic_market(days=800, selloff_days=60):
 
 
 @pytest.fixture
-def mocked_fred_and_yfinance(monkeypatch):
+def mocked_fred_and_yfinance(monkeypatch, tmp_path):
     idx, yf_data = _build_synthetic_market()
+    monkeypatch.setattr(ui, "DERIVED_CACHE_DIR", str(tmp_path / "derived"))
+    # Breadth runs over the synthetic tickers instead of the scraped S&P 500.
+    monkeypatch.setattr(ui.market_breadth, "BREADTH_CACHE_DIR", str(tmp_path / "breadth"))
+    monkeypatch.setattr(
+        ui.market_breadth, "get_universe",
+        lambda cache_dir=None: list(yf_data.columns.get_level_values(1)),
+    )
 
     fake_fred = MagicMock()
     rng = np.random.default_rng(7)
@@ -136,6 +143,13 @@ def test_synthetic_stagflation_onset_lands_in_stagflation_quadrant(
         f"expected Inflation_Index > 0 after a commodity/inflation-"
         f"expectations spike, got {market_data['inflation']}"
     )
+    # Bootstrap quadrant probabilities should agree with the point estimate.
+    assert market_data["prob_stagflation"] > 0.5, (
+        f"expected Stagflation to be the most likely quadrant, got "
+        f"{market_data['prob_stagflation']}"
+    )
+    assert market_data["growth_lower"] <= market_data["growth_upper"]
+    assert market_data["score_breadth"] is not None
 
 
 # --- TC-I02: live data regression guard -----------------------------------
@@ -159,3 +173,126 @@ def test_live_data_is_not_stuck_in_a_single_quadrant():
         "all recent records share the same Growth AND Inflation sign — "
         "the scatter chart is stuck in a single quadrant"
     )
+
+
+# --- TC-I03: derived-frame cache -----------------------------------------
+
+def test_repeated_run_is_served_from_derived_cache(mocked_fred_and_yfinance, monkeypatch):
+    """Second run on unchanged inputs must not recompute; changing a formula
+    constant must invalidate the entry and recompute.
+    """
+    # The fixture re-draws T5YIFR noise per call, so fetch the raw inputs once.
+    raw_df = ui.fetch_aligned_inputs(mocked_fred_and_yfinance, {"us": ui.UNIVERSES["us"]})["us"]
+    first = ui.compute_indices_cached(raw_df)
+
+    real_compute = ui.compute_indices
+    calls = []
+
+    def counting_compute(raw_df):
+        calls.append(1)
+        return real_compute(raw_df)
+
+    monkeypatch.setattr(ui, "compute_indices", counting_compute)
+
+    cached = ui.compute_indices_cached(raw_df)
+    assert calls == []
+    pd.testing.assert_frame_equal(first, cached)
+
+    monkeypatch.setattr(ui, "EMA_SPAN", ui.EMA_SPAN + 1)
+    ui.compute_indices_cached(raw_df)
+    assert calls == [1]
+
+
+# --- TC-I04: multi-universe run -------------------------------------------
+
+def test_multiple_universes_share_one_fetch_and_compute_in_parallel(
+    mocked_fred_and_yfinance,
+):
+    """Every universe gets its own valid_df from one deduplicated fetch; a
+    universe missing a critical ticker is skipped without failing the others.
+    """
+    universes = {
+        "us": ui.UNIVERSES["us"],
+        "custom_split": dict(
+            ui.US_UNIVERSE,
+            output_path="data/market_indices_custom_split.json",
+            cyclical=["XLY", "XLK"],
+            defensive=["XLP", "XLU"],
+            breadth=None,
+        ),
+        "no_volatility": dict(
+            ui.US_UNIVERSE,
+            output_path="data/market_indices_no_volatility.json",
+            tickers=dict(ui.US_UNIVERSE["tickers"], Volatility="^MISSING"),
+        ),
+    }
+
+    results = ui.compute_universe_dataframes(mocked_fred_and_yfinance, universes)
+
+    assert results["no_volatility"] is None
+    for name in ("us", "custom_split"):
+        assert results[name] is not None and not results[name].empty
+        assert results[name]["Regime_Label"].notna().all()
+    assert not results["us"]["Growth_Index"].equals(results["custom_split"]["Growth_Index"])
+    # Breadth is opt-in per universe, not inherited from the copied spec.
+    assert results["us"]["Score_Breadth"].notna().any()
+    assert results["custom_split"]["Score_Breadth"].isna().all()
+
+    fetched = [c.args[0] for c in mocked_fred_and_yfinance.get_series.call_args_list]
+    assert sorted(fetched) == sorted(set(ui.US_UNIVERSE["fred"].values()))
+
+
+# --- TC-I05: breadth outages are bridged briefly, then fall back loudly ----
+
+def test_breadth_outage_is_carried_forward_only_briefly(mocked_fred_and_yfinance, capsys):
+    """A breadth gap up to BREADTH_MAX_STALE_DAYS keeps the 5-way Sentiment
+    average; a longer one falls back to the 4 core scores and says so.
+    """
+    raw_df = ui.fetch_aligned_inputs(mocked_fred_and_yfinance, {"us": ui.UNIVERSES["us"]})["us"]
+    core = ["Score_Momentum", "Score_VIX", "Score_SafeHaven", "Score_Junk"]
+
+    short_gap = raw_df.copy()
+    short_gap.iloc[-ui.BREADTH_MAX_STALE_DAYS:, short_gap.columns.get_loc("Breadth_Pct_Above_MA")] = np.nan
+    bridged = ui.compute_indices(short_gap)
+    assert bridged["Score_Breadth"].iloc[-1:].notna().all()
+    assert "falls back" not in capsys.readouterr().out
+
+    long_gap = raw_df.copy()
+    long_gap.iloc[-ui.BREADTH_MAX_STALE_DAYS - 1:, long_gap.columns.get_loc("Breadth_Pct_Above_MA")] = np.nan
+    fallback = ui.compute_indices(long_gap)
+    latest = fallback.iloc[-1]
+    assert pd.isna(latest["Score_Breadth"])
+    assert latest["Sentiment_Index"] == pytest.approx(latest[core].mean())
+    assert "falls back to its 4 core scores" in capsys.readouterr().out
+
+
+# --- TC-I06: each universe runs on its own market's sessions ---------------
+
+def test_universe_calendar_excludes_days_its_market_was_closed(
+    mocked_fred_and_yfinance, monkeypatch,
+):
+    """A European universe trading on a US holiday must not give the US
+    universe a phantom session (Friday's SPY carried onto Monday).
+    """
+    _, data = _build_synthetic_market()
+    data[("Adj Close", "EXSA.DE")] = data[("Adj Close", "SPY")] * 0.4
+    us_columns = [c for c in data.columns if c[1] not in ("EXSA.DE", "GC=F", "HG=F")]
+    us_holidays = data.index[[-1, -150]]  # the latest day and one mid-history
+    data.loc[us_holidays, us_columns] = np.nan
+    monkeypatch.setattr(ui.yf, "download", lambda *a, **kw: data)
+
+    universes = {
+        "us": ui.UNIVERSES["us"],
+        "eu": dict(
+            ui.US_UNIVERSE,
+            output_path="data/market_indices_eu.json",
+            tickers=dict(ui.US_UNIVERSE["tickers"], Equity="EXSA.DE"),
+            breadth=None,
+        ),
+    }
+    results = ui.compute_universe_dataframes(mocked_fred_and_yfinance, universes)
+
+    assert results["us"].index.intersection(us_holidays).empty
+    assert results["us"].index[-1] == data.index[-2]
+    assert results["eu"].index[-1] == data.index[-1]
+    assert us_holidays[1] in results["eu"].index
@@ -0,0 +1,225 @@
+"""Unit tests for scripts/market_breadth.py (no network: yf.download is
+monkeypatched).
+
+Run: pytest test/unit/test_market_breadth.py -v
+"""
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+
+import market_breadth as mb  # noqa: E402
+
+
+def _random_prices(days=300, tickers=("AAA", "BBB", "CCC", "DDD"), seed=0):
+    idx = pd.bdate_range("2023-01-02", periods=days)
+    rng = np.random.default_rng(seed)
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=(days, len(tickers))), axis=0))
+    return pd.DataFrame(values, index=idx, columns=list(tickers))
+
+
+def _fake_download(prices, fail_on=()):
+    """Stand-in for yf.download returning `prices`' columns in the
+    (Price, Ticker) MultiIndex layout; tickers not in `prices` are missing.
+    """
+    def download(tickers, start=None, **kwargs):
+        if any(t in fail_on for t in tickers):
+            raise RuntimeError("chunk failed")
+        cols = [t for t in tickers if t in prices.columns]
+        frame = prices.loc[prices.index >= pd.Timestamp(start), cols]
+        frame.columns = pd.MultiIndex.from_product([["Close"], cols])
+        return frame
+    return download
+
+
+# --- TC-B01: vectorized % above MA matches a per-column pandas reference --
+
+def test_pct_above_ma_matches_rolling_reference():
+    prices = _random_prices()
+    prices.iloc[250:260, 1] = np.nan  # a halted member drops out for its NaN window
+
+    pct = mb.get_pct_above_ma(prices, window=50, min_coverage=0.5)
+
+    ma = prices.rolling(window=50).mean()
+    eligible = prices.notna() & ma.notna()
+    n_eligible = eligible.sum(axis=1).astype(float)
+    expected = 100 * (prices > ma).where(eligible, False).sum(axis=1) / n_eligible
+    expected[n_eligible < 2] = np.nan
+
+    pd.testing.assert_series_equal(pct, expected, check_names=False)
+    assert pct.iloc[:49].isna().all()
+
+
+# --- TC-B02: chunked download degrades gracefully ------------------------
+
+def test_download_price_matrix_skips_failed_chunks_and_missing_tickers(monkeypatch):
+    prices = _random_prices()
+    monkeypatch.setattr(mb.yf, "download", _fake_download(prices, fail_on={"CCC"}))
+
+    matrix = mb.download_price_matrix(
+        ["AAA", "BBB", "CCC", "DDD", "GONE"], "2023-01-02", chunk_size=2, max_workers=2
+    )
+
+    # Chunk [CCC, DDD] failed and GONE has no data; the rest still arrive.
+    assert sorted(matrix.columns) == ["AAA", "BBB"]
+    assert matrix.dtypes.eq(np.float32).all()
+    assert len(matrix) == len(prices)
+
+
+def test_download_price_matrix_passes_a_per_request_timeout(monkeypatch):
+    prices = _random_prices()
+    download = _fake_download(prices)
+    timeouts = []
+
+    def recording_download(tickers, start=None, **kwargs):
+        timeouts.append(kwargs.get("timeout"))
+        return download(tickers, start=start, **kwargs)
+
+    monkeypatch.setattr(mb.yf, "download", recording_download)
+    mb.download_price_matrix(list(prices.columns), "2023-01-02", chunk_size=2, timeout=5)
+
+    assert timeouts == [5, 5]
+
+
+def test_download_price_matrix_drops_chunks_past_the_deadline(monkeypatch):
+    prices = _random_prices()
+    download = _fake_download(prices)
+    release = threading.Event()
+    started = []
+
+    def slow_download(tickers, start=None, **kwargs):
+        started.append(tickers[0])
+        if tickers[0] == "BBB":
+            release.wait(5)  # hangs past the deadline
+        return download(tickers, start=start, **kwargs)
+
+    monkeypatch.setattr(mb.yf, "download", slow_download)
+    try:
+        matrix = mb.download_price_matrix(
+            ["AAA", "BBB", "CCC"], "2023-01-02", chunk_size=1, max_workers=1, deadline=0.2
+        )
+    finally:
+        release.set()
+
+    # AAA arrived, BBB missed the deadline, CCC was never started.
+    assert list(matrix.columns) == ["AAA"]
+    assert started == ["AAA", "BBB"]
+
+
+# --- TC-B03: incremental cache only re-downloads recent days -------------
+
+def test_load_price_matrix_refreshes_only_recent_days(monkeypatch, tmp_path):
+    prices = _random_prices()
+    starts = []
+    download = _fake_download(prices.iloc[:200])
+
+    def recording_download(tickers, start=None, **kwargs):
+        starts.append(start)
+        return download(tickers, start=start, **kwargs)
+
+    monkeypatch.setattr(mb.yf, "download", recording_download)
+    first = mb.load_price_matrix(list(prices.columns), "2023-01-02", cache_dir=str(tmp_path))
+    assert len(first) == 200
+
+    download = _fake_download(prices)
+    starts.clear()
+    second = mb.load_price_matrix(list(prices.columns), "2023-01-02", cache_dir=str(tmp_path))
+
+    assert len(second) == len(prices)
+    assert all(pd.Timestamp(s) > prices.index[190] for s in starts)
+    np.testing.assert_allclose(second.to_numpy(), prices.to_numpy(dtype=np.float32))
+
+
+# --- TC-B04: gaps older than the overlap window heal once a chunk recovers -
+
+def test_load_price_matrix_heals_gaps_older_than_overlap(monkeypatch, tmp_path):
+    prices = _random_prices()
+    monkeypatch.setattr(mb.yf, "download", _fake_download(prices.iloc[:200]))
+    mb.load_price_matrix(list(prices.columns), "2023-01-02", cache_dir=str(tmp_path))
+
+    # CCC's chunk returns nothing for a month of daily runs...
+    for end in range(201, 230):
+        monkeypatch.setattr(mb.yf, "download", _fake_download(prices.iloc[:end].drop(columns="CCC")))
+        stale = mb.load_price_matrix(list(prices.columns), "2023-01-02", cache_dir=str(tmp_path))
+    assert stale["CCC"].iloc[200:].isna().all()
+
+    # ...then recovers: the whole outage is backfilled, not just the overlap.
+    monkeypatch.setattr(mb.yf, "download", _fake_download(prices))
+    healed = mb.load_price_matrix(list(prices.columns), "2023-01-02", cache_dir=str(tmp_path))
+
+    assert healed.notna().all().all()
+    np.testing.assert_allclose(healed.to_numpy(), prices.to_numpy(dtype=np.float32))
+
+
+# --- TC-B05: a split back-adjusts the cached history ----------------------
+
+def test_load_price_matrix_redownloads_re_adjusted_tickers_in_full(monkeypatch, tmp_path):
+    prices = _random_prices()
+    monkeypatch.setattr(mb.yf, "download", _fake_download(prices.iloc[:200]))
+    mb.load_price_matrix(list(prices.columns), "2023-01-02", cache_dir=str(tmp_path))
+
+    # BBB splits 10:1; Yahoo rescales its whole adjusted history.
+    adjusted = prices.copy()
+    adjusted["BBB"] /= 10
+    download = _fake_download(adjusted)
+    calls = []
+
+    def recording_download(tickers, start=None, **kwargs):
+        calls.append((list(tickers), start))
+        return download(tickers, start=start, **kwargs)
+
+    monkeypatch.setattr(mb.yf, "download", recording_download)
+    matrix = mb.load_price_matrix(list(prices.columns), "2023-01-02", cache_dir=str(tmp_path))
+
+    np.testing.assert_allclose(matrix.to_numpy(), adjusted.to_numpy(dtype=np.float32), rtol=1e-6)
+    assert (["BBB"], "2023-01-02") in calls
+    assert not any(start == "2023-01-02" and tickers != ["BBB"] for tickers, start in calls)
+
+
+# --- TC-B06: stray bars and unfixable holes don't force daily re-downloads -
+
+def test_load_price_matrix_retries_each_gap_only_once(monkeypatch, tmp_path):
+    prices = _random_prices()
+    prices.iloc[100, 1] = np.nan  # BBB halted: a hole Yahoo never fills
+    saturday = pd.Timestamp("2023-03-04")
+    prices.loc[saturday] = [101.0, np.nan, np.nan, np.nan]  # stray bar for AAA only
+    prices = prices.sort_index()
+
+    starts = []
+    source = {"prices": prices.iloc[:200]}
+
+    def recording_download(tickers, start=None, **kwargs):
+        starts.append((list(tickers), start))
+        return _fake_download(source["prices"])(tickers, start=start, **kwargs)
+
+    monkeypatch.setattr(mb.yf, "download", recording_download)
+    mb.load_price_matrix(list(prices.columns), "2023-01-02", cache_dir=str(tmp_path))
+
+    def run(end):
+        source["prices"] = prices.iloc[:end]
+        starts.clear()
+        mb.load_price_matrix(list(prices.columns), "2023-01-02", cache_dir=str(tmp_path))
+        return [(tickers, pd.Timestamp(s)) for tickers, s in starts if pd.Timestamp(s) < prices.index[190]]
+
+    # The halt is retried once, for BBB alone; the Saturday bar marks nobody.
+    assert run(205) == [(["BBB"], prices.index[101])]
+    assert run(210) == []
+
+
+# --- TC-B07: breadth is warm from the first calendar day ------------------
+
+def test_fetch_breadth_fetches_ma_lookback_before_start(monkeypatch, tmp_path):
+    prices = _random_prices(days=600)
+    calendar = prices.index[300:]
+    monkeypatch.setattr(mb, "BREADTH_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(mb, "get_universe", lambda cache_dir=None: list(prices.columns))
+    monkeypatch.setattr(mb.yf, "download", _fake_download(prices))
+
+    breadth = mb.fetch_breadth(calendar[0].strftime("%Y-%m-%d"), calendar)
+
+    assert breadth.index.equals(calendar)
+    assert breadth.notna().all()
@@ -2,8 +2,10 @@
 
 Run: pytest test/unit/test_update_indices.py -v
 """
+import json
 import sys
 from pathlib import Path
+from unittest.mock import MagicMock
 
 import numpy as np
 import pandas as pd
@@ -146,3 +148,289 @@ def test_cyc_def_ratio_zscore_uses_roc_not_raw_level():
         f"a ratio with constant drift should Z-score near zero on its RoC "
         f"(mean-reverting), got {last_valid}"
     )
+
+
+# --- TC-U08: FRED as-of alignment respects publication lag ---------------
+
+def test_align_fred_series_stamps_weekly_data_on_release_date():
+    """A weekly observation dated Saturday (e.g. ICSA week-ending) must not
+    be visible on the trading calendar until its release date — observation
+    date + the configured lag — and then carry forward until the next
+    release. Daily series with no lag line up on their own date.
+    """
+    calendar = pd.bdate_range("2024-01-01", "2024-01-31")
+    weekly = pd.Series(
+        [200_000.0, 210_000.0],
+        index=pd.to_datetime(["2024-01-06", "2024-01-13"]),  # Saturdays
+    )
+    daily = pd.Series(np.arange(len(calendar), dtype=float), index=calendar)
+
+    aligned = ui.align_fred_series(
+        {"ICSA": weekly, "DGS10": daily},
+        calendar,
+        release_lags={"ICSA": 4, "DGS10": 0},
+    )
+
+    assert list(aligned.columns) == ["ICSA", "DGS10"]
+    assert aligned.loc[:"2024-01-10", "ICSA"].isna().all()
+    assert aligned.loc["2024-01-11", "ICSA"] == 200_000.0  # Thursday release
+    assert aligned.loc["2024-01-17", "ICSA"] == 200_000.0
+    assert aligned.loc["2024-01-18", "ICSA"] == 210_000.0
+    assert aligned.loc["2024-01-31", "ICSA"] == 210_000.0
+    np.testing.assert_array_equal(aligned["DGS10"].to_numpy(), daily.to_numpy())
+
+
+def test_align_fred_series_daily_h15_series_lags_one_business_day():
+    """DGS10 for day t is posted on FRED the next business day, so the
+    00:00 UTC cron for day t can't see it: Friday's value first appears on
+    Monday's row.
+    """
+    calendar = pd.bdate_range("2024-01-01", "2024-01-12")
+    daily = pd.Series(np.arange(len(calendar), dtype=float), index=calendar)
+
+    aligned = ui.align_fred_series({"DGS10": daily}, calendar)
+
+    assert ui.FRED_RELEASE_LAG_DAYS["DGS10"] == 1
+    assert np.isnan(aligned.loc["2024-01-01", "DGS10"])
+    assert aligned.loc["2024-01-08", "DGS10"] == daily.loc["2024-01-05"]  # Mon <- Fri
+    np.testing.assert_array_equal(aligned["DGS10"].to_numpy()[1:], daily.to_numpy()[:-1])
+
+
+def test_align_fred_series_missing_series_is_all_nan_column():
+    """A series that failed to fetch (None) still gets a column so callers
+    can degrade gracefully, matching the old `df['ICSA'] = nan` fallback.
+    """
+    calendar = pd.bdate_range("2024-01-01", periods=5)
+    daily = pd.Series([1.0, 2.0, 3.0, 4.0, 5.0], index=calendar)
+
+    aligned = ui.align_fred_series(
+        {"DGS2": daily, "ICSA": None},
+        calendar,
+        release_lags={"DGS2": 0, "ICSA": 4},
+    )
+
+    assert aligned["ICSA"].isna().all()
+    assert aligned["DGS2"].iloc[-1] == 5.0
+
+
+# --- TC-U09: bootstrap confidence bands / quadrant probabilities ---------
+
+def _synthetic_component_frame(days=400, seed=0):
+    idx = pd.bdate_range("2022-01-03", periods=days)
+    rng = np.random.default_rng(seed)
+    cols = ["Z_PMI", "Z_Ratio", "Z_ICSA", "Z_T5YIFR", "Z_Commodity"]
+    df = pd.DataFrame(
+        {c: np.cumsum(rng.normal(0, 0.1, size=days)) for c in cols}, index=idx
+    )
+    df["Growth_Index"] = ui.get_ema(
+        df[["Z_PMI", "Z_Ratio", "Z_ICSA"]].mean(axis=1), ui.EMA_SPAN
+    )
+    df["Inflation_Index"] = ui.get_ema(
+        0.5 * df["Z_T5YIFR"] + 0.5 * df["Z_Commodity"], ui.EMA_SPAN
+    )
+    return df
+
+
+def test_bootstrap_bands_are_reproducible_and_probabilities_sum_to_one():
+    df = _synthetic_component_frame()
+
+    bands = ui.get_bootstrap_bands(df, n_samples=500, seed=1)
+    again = ui.get_bootstrap_bands(df, n_samples=500, seed=1)
+    valid = bands.dropna()
+
+    assert not valid.empty
+    pd.testing.assert_frame_equal(bands, again)
+    assert (valid["Growth_Lower"] <= valid["Growth_Upper"]).all()
+    assert (valid["Inflation_Lower"] <= valid["Inflation_Upper"]).all()
+    probs = valid[["Prob_Overheat", "Prob_Stagflation", "Prob_Deflation", "Prob_Reflation"]]
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0)
+
+
+def test_bootstrap_bands_are_point_in_time():
+    """Bands for a day must not change when later history is appended —
+    only noise blocks that ended on or before that day may be drawn.
+    """
+    df = _synthetic_component_frame()
+
+    full = ui.get_bootstrap_bands(df, n_samples=300, seed=3)
+    truncated = ui.get_bootstrap_bands(df.iloc[:250], n_samples=300, seed=3)
+
+    pd.testing.assert_frame_equal(full.iloc[:250], truncated)
+    # Early days have too few past blocks to resample from.
+    assert full.iloc[:ui.BOOTSTRAP_BLOCK_LENGTH].isna().all().all()
+
+
+def test_bootstrap_bands_replace_the_days_own_noise():
+    """A draw replaces the day's realized noise rather than adding to it: a
+    one-day spike in a component moves the point estimate, but the band
+    (built from past blocks with no noise) should sit below it.
+    """
+    idx = pd.bdate_range("2024-01-01", periods=120)
+    cols = ["Z_PMI", "Z_Ratio", "Z_ICSA", "Z_T5YIFR", "Z_Commodity"]
+    df = pd.DataFrame(0.5, index=idx, columns=cols)
+    df.iloc[-1, df.columns.get_loc("Z_PMI")] = 5.0
+    df["Growth_Index"] = ui.get_ema(df[["Z_PMI", "Z_Ratio", "Z_ICSA"]].mean(axis=1), ui.EMA_SPAN)
+    df["Inflation_Index"] = ui.get_ema(0.5 * df["Z_T5YIFR"] + 0.5 * df["Z_Commodity"], ui.EMA_SPAN)
+
+    bands = ui.get_bootstrap_bands(df, n_samples=1000, seed=0)
+    last = bands.iloc[-1]
+
+    assert last["Growth_Upper"] < df["Growth_Index"].iloc[-1]
+    assert last["Growth_Lower"] > 0.5  # the spike's EMA carry-over still lifts the level
+
+
+# --- TC-U10: derived-frame cache key + LRU eviction -----------------------
+
+def test_derived_cache_key_tracks_inputs_and_formula_constants(monkeypatch):
+    idx = pd.bdate_range("2024-01-01", periods=5)
+    raw = pd.DataFrame({"SPY": [1.0, 2.0, 3.0, 4.0, 5.0]}, index=idx)
+
+    key = ui.get_derived_cache_key(raw)
+    assert ui.get_derived_cache_key(raw.copy()) == key
+
+    changed = raw.copy()
+    changed.iloc[-1, 0] = 5.5
+    assert ui.get_derived_cache_key(changed) != key
+
+    monkeypatch.setattr(ui, "Z_SCORE_WINDOW", ui.Z_SCORE_WINDOW + 1)
+    assert ui.get_derived_cache_key(raw) != key
+
+
+def test_derived_cache_evicts_least_recently_used(monkeypatch, tmp_path):
+    monkeypatch.setattr(ui, "compute_indices", lambda raw_df: raw_df * 2)
+    idx = pd.bdate_range("2024-01-01", periods=3)
+    frames = [pd.DataFrame({"SPY": [float(i)] * 3}, index=idx) for i in range(3)]
+
+    ui.compute_indices_cached(frames[0], cache_dir=str(tmp_path), max_entries=2)
+    ui.compute_indices_cached(frames[1], cache_dir=str(tmp_path), max_entries=2)
+    # Touch frame 0 so frame 1 becomes the least recently used entry.
+    ui.compute_indices_cached(frames[0], cache_dir=str(tmp_path), max_entries=2)
+    ui.compute_indices_cached(frames[2], cache_dir=str(tmp_path), max_entries=2)
+
+    remaining = {p.stem for p in tmp_path.glob("*.pkl")}
+    assert remaining == {
+        ui.get_derived_cache_key(frames[0]),
+        ui.get_derived_cache_key(frames[2]),
+    }
+
+
+# --- TC-U11: skip-if-unchanged pre-flight --------------------------------
+
+def _write_freshness_state(tmp_path, last_date, stamps):
+    """Single-universe (US) config whose output file ends at `last_date`."""
+    data_path = tmp_path / "market_indices.json"
+    freshness_path = tmp_path / "source_freshness.json"
+    data_path.write_text(json.dumps([["2024-01-04"], [last_date]]))
+    ui.save_source_freshness(stamps, freshness_path=str(freshness_path))
+    universes = {"us": dict(ui.US_UNIVERSE, output_path=str(data_path))}
+    return universes, str(freshness_path)
+
+
+def _us_stamps():
+    stamps = {sid: "2024-01-05 07:45:00-06" for sid in ui.US_UNIVERSE["fred"].values()}
+    stamps["SPY"] = "2024-01-05"
+    return stamps
+
+
+def test_preflight_skips_when_no_source_moved(tmp_path):
+    stamps = _us_stamps()
+    universes, freshness_path = _write_freshness_state(tmp_path, "2024-01-05", stamps)
+
+    # Weekend run: same last bar, no FRED series re-published.
+    assert not ui.has_new_source_data(dict(stamps), universes, freshness_path)
+
+
+def test_preflight_runs_on_new_bar_or_fred_update(tmp_path):
+    stamps = _us_stamps()
+    universes, freshness_path = _write_freshness_state(tmp_path, "2024-01-05", stamps)
+
+    new_bar = dict(stamps, SPY="2024-01-08")
+    assert ui.has_new_source_data(new_bar, universes, freshness_path)
+
+    fred_update = dict(stamps, ICSA="2024-01-11 07:31:00-06")
+    assert ui.has_new_source_data(fred_update, universes, freshness_path)
+
+    # Missing metadata fails open.
+    missing = {k: v for k, v in stamps.items() if k != "WALCL"}
+    assert ui.has_new_source_data(missing, universes, freshness_path)
+    assert ui.has_new_source_data(stamps, universes, str(tmp_path / "absent.json"))
+
+
+def test_preflight_runs_when_only_another_universes_market_traded(tmp_path, monkeypatch):
+    stamps = _us_stamps()
+    universes, freshness_path = _write_freshness_state(tmp_path, "2024-01-05", stamps)
+    eu_path = tmp_path / "market_indices_eu.json"
+    eu_path.write_text(json.dumps([["2024-01-05"]]))
+    universes["eu"] = dict(
+        ui.US_UNIVERSE,
+        output_path=str(eu_path),
+        tickers=dict(ui.US_UNIVERSE["tickers"], Equity="EXSA.DE"),
+        breadth=None,
+    )
+
+    # US holiday (no new SPY bar) while the European market traded.
+    bars = pd.DataFrame(
+        {("Close", "SPY"): [470.0, np.nan], ("Close", "EXSA.DE"): [48.0, 48.5]},
+        index=pd.to_datetime(["2024-01-05", "2024-01-08"]),
+    )
+    monkeypatch.setattr(ui.yf, "download", lambda tickers, **kwargs: bars[[("Close", t) for t in tickers]])
+    fred = MagicMock()
+    fred.get_series_info.side_effect = lambda sid: {"last_updated": stamps[sid]}
+
+    current = ui.get_source_freshness(fred, universes)
+
+    assert current["SPY"] == "2024-01-05"
+    assert current["EXSA.DE"] == "2024-01-08"
+    assert not ui.has_new_source_data(current, {"us": universes["us"]}, freshness_path)
+    assert ui.has_new_source_data(current, universes, freshness_path)
+
+
+# --- TC-U12: first-paint snapshot ----------------------------------------
+
+def test_sparkline_path_spans_viewbox_with_integer_coordinates():
+    path = ui.get_sparkline_path([1.0, 3.0, None, 2.0], size=(100, 30))
+
+    # None is skipped: 3 points spread across the full width; the max sits
+    # at the top (y=0) and the min at the bottom (y=height).
+    assert path == "M0,30 50,0 100,15"
+    assert ui.get_sparkline_path([5.0]) == ""
+
+
+def test_write_snapshot_is_small_and_matches_latest_record(tmp_path):
+    rng = np.random.default_rng(0)
+    records = []
+    for k, day in enumerate(pd.bdate_range("2025-01-01", periods=300)):
+        g, i = np.round(rng.normal(size=2), 2)
+        records.append([day.strftime("%Y-%m-%d"), g, i, 0.1, 55.0 + k % 7, -0.2]
+                       + [0.0] * 12 + [0.5, "REFLATION"])
+    data_path = tmp_path / "market_indices.json"
+    snapshot_path = tmp_path / "snapshot.json"
+    data_path.write_text(json.dumps(records))
+
+    ui.write_snapshot(str(data_path), str(snapshot_path))
+    snapshot = json.loads(snapshot_path.read_text())
+
+    assert snapshot["date"] == records[-1][0]
+    assert snapshot["growth"] == records[-1][1]
+    assert snapshot["regime_label"] == "REFLATION"
+    assert snapshot["trail"] == [[r[1], r[2]] for r in records[-60:]]
+    assert snapshot["sparklines"]["sentiment"].startswith("M0,")
+    assert snapshot_path.stat().st_size < 2048
+
+
+# --- TC-U13: one-time run-date -> session-date migration -----------------
+
+def test_migrate_records_moves_cron_rows_to_their_session():
+    import migrate_run_dated_records as migration
+
+    records = [
+        ["2026-07-02", 0.1],  # backfilled, already session-dated
+        ["2026-07-03", 0.2],  # Fri (holiday) run -> Thu 07-02 session
+        ["2026-07-04", 0.3],  # Sat run -> Thu 07-02 (07-03 is the July 4th holiday)
+        ["2026-07-06", 0.4],  # Mon run -> Thu 07-02
+        ["2026-07-07", 0.5],  # Tue run -> Mon 07-06
+    ]
+
+    migrated = migration.migrate_records(records, since="2026-07-03")
+
+    assert migrated == [["2026-07-02", 0.4], ["2026-07-06", 0.5]]